@@ -0,0 +1,259 @@
+import asyncio
+import csv
+import hashlib
+import io
+import os
+import re
+import threading
+import urllib.parse
+
+from langchain_community.utilities import SQLDatabase
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnablePassthrough
+from langchain_groq import ChatGroq
+import streamlit as st
+
+from llm_cache import LRUCache, SemanticCache
+from prompts import (
+    NL_PROMPT,
+    SCHEMA_HASH,
+    SQL_GRAMMAR,
+    SQL_PROMPT,
+    SUMMARY_PROMPT,
+    schema_for_question,
+)
+
+try:
+    from llama_cpp import Llama, LlamaGrammar, LlamaRAMCache
+except ImportError:
+    Llama = None
+
+# Only the most recent turns are sent verbatim; older ones are folded into a
+# running summary every SUMMARY_EVERY_TURNS turns
+MAX_HISTORY_TURNS = 6
+SUMMARY_EVERY_TURNS = 4
+
+# Rows of a query result passed to the answer prompt
+MAX_RESULT_ROWS = 50
+
+# A period followed by whitespace or the end of the text, so decimals like
+# 4.12 don't end the first sentence
+SENTENCE_END = re.compile(r"\.(?=\s|$)")
+
+# One SQLDatabase (and SQLAlchemy connection pool) per connection target,
+# shared across reruns so queries reuse warm connections. The password only
+# enters the cache key as a digest; a failed connect raises and is not cached.
+@st.cache_resource(show_spinner=False)
+def _connect(user: str, host: str, port: str, database: str, password_digest: str, _password: str) -> SQLDatabase:
+    db_uri = f"mysql+mysqlconnector://{user}:{urllib.parse.quote(_password)}@{host}:{port}/{database}"
+    return SQLDatabase.from_uri(
+        db_uri,
+        engine_args={
+            "pool_size": 5,
+            "pool_pre_ping": True,
+            "pool_recycle": 1800,
+            # run_sql stops reading its unbuffered cursor after
+            # MAX_RESULT_ROWS; let the driver discard the rest on close
+            # instead of failing with "Unread result found"
+            "connect_args": {"consume_results": True},
+        },
+    )
+
+def init_database(user: str, password: str, host: str, port: str, database: str) -> SQLDatabase:
+    try:
+        password_digest = hashlib.blake2b(password.encode(), digest_size=16).hexdigest()
+        return _connect(user, host, port, database, password_digest, password)
+    except Exception as e:
+        st.error(f"Error initializing database: {e}")
+        return None
+
+def run_sql(db: SQLDatabase, query: str) -> str:
+    # SQLAlchemy's mysqlconnector dialect makes cursors buffered by default,
+    # which pulls the whole result set over on execute. An unbuffered cursor
+    # only transfers the MAX_RESULT_ROWS + 1 rows read here; the rest are
+    # discarded when it closes. Returned as CSV so the answer prompt stays small.
+    connection = db._engine.raw_connection()
+    try:
+        cursor = connection.cursor(buffered=False)
+        try:
+            cursor.execute(query.strip().rstrip(";"))
+            if cursor.description is None:
+                return ""
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchmany(MAX_RESULT_ROWS + 1)
+        finally:
+            cursor.close()
+    finally:
+        connection.close()
+    
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(columns)
+    writer.writerows(rows[:MAX_RESULT_ROWS])
+    if len(rows) > MAX_RESULT_ROWS:
+        output.write(f"(showing the first {MAX_RESULT_ROWS} rows)\n")
+    return output.getvalue()
+
+# Exact repeats of a question in the same scope skip everything, including
+# the embedding
+_answers = LRUCache(maxsize=512, ttl=3600)
+
+@st.cache_resource(show_spinner=False)
+def _semantic_cache() -> SemanticCache:
+    return SemanticCache("llm_cache.sqlite3")
+
+@st.cache_resource(show_spinner=False)
+def _llm() -> ChatGroq:
+    return ChatGroq(model="mixtral-8x7b-32768", temperature=0)
+
+@st.cache_resource(show_spinner=False)
+def _local_sql_llm():
+    llm = Llama(model_path=os.environ["LLAMA_MODEL_PATH"], n_ctx=4096, verbose=False)
+    # Keep the KV state of the shared schema/examples prefix between calls
+    llm.set_cache(LlamaRAMCache())
+    return llm, LlamaGrammar.from_string(SQL_GRAMMAR, verbose=False), threading.Lock()
+
+_LLAMA_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+def _local_sql_generator():
+    llm, grammar, lock = _local_sql_llm()
+    
+    def generate(prompt_value) -> str:
+        messages = [
+            {"role": _LLAMA_ROLES[message.type], "content": message.content}
+            for message in prompt_value.to_messages()
+        ]
+        # One Llama context is shared by every session and is not thread-safe
+        with lock:
+            result = llm.create_chat_completion(
+                messages=messages,
+                grammar=grammar,
+                temperature=0,
+                max_tokens=256,
+            )
+        return result["choices"][0]["message"]["content"]
+    return generate
+
+def get_sql_chain():
+    with_schema = RunnablePassthrough.assign(schema=lambda vars: schema_for_question(vars["question"]))
+    
+    # A local grammar-constrained model saves a network round-trip on the
+    # critical path and can only emit a single SELECT statement
+    if Llama is not None and os.getenv("LLAMA_MODEL_PATH"):
+        return with_schema | SQL_PROMPT | _local_sql_generator()
+    
+    return (
+        with_schema
+        | SQL_PROMPT
+        | _llm()
+        | StrOutputParser()
+    )
+
+# temperature=0 makes the SQL a function of the question and schema, so it is
+# shared across reruns and sessions. Entries are only added once the query has
+# run, so SQL the database rejected is regenerated instead of replayed.
+_generated_sql = LRUCache(maxsize=512, ttl=3600)
+
+def generate_sql(question: str) -> str:
+    query = _generated_sql.get((question, SCHEMA_HASH))
+    if query is None:
+        query = get_sql_chain().invoke({"question": question})
+    return query
+
+def format_history(chat_history: list, summary: str = "") -> str:
+    lines = [f"summary: {summary}"] if summary else []
+    lines.extend(
+        f"{message['role']}: {message['content']}"
+        for message in chat_history
+    )
+    return "\n".join(lines)
+
+def history_window(chat_history: list, summarized_upto: int) -> list:
+    # Everything not yet folded into the summary is sent verbatim, even if it
+    # is older than the last MAX_HISTORY_TURNS turns, so no message falls
+    # between the summary and the window
+    return chat_history[min(summarized_upto, max(0, len(chat_history) - MAX_HISTORY_TURNS * 2)):]
+
+def update_history_summary():
+    history = st.session_state.chat_history
+    cutoff = len(history) - MAX_HISTORY_TURNS * 2
+    start = st.session_state.summarized_upto
+    if cutoff - start < SUMMARY_EVERY_TURNS * 2:
+        return
+    
+    chain = SUMMARY_PROMPT | _llm() | StrOutputParser()
+    st.session_state.history_summary = chain.invoke({
+        "summary": st.session_state.history_summary,
+        "messages": format_history(history[start:cutoff]),
+    })
+    st.session_state.summarized_upto = cutoff
+
+def _connection_scope(db: SQLDatabase) -> str:
+    # Cached answers are only valid for the same database; the password never
+    # enters the key
+    url = db._engine.url
+    return f"{url.username}@{url.host}:{url.port}/{url.database}"
+
+async def get_response_async(user_query: str, db: SQLDatabase, chat_history: list, history_summary: str, scope: str, placeholder):
+    # temperature=0 makes rephrased repeats produce the same answer, so serve
+    # them from the semantic cache without calling the LLM at all
+    cache = _semantic_cache()
+    embedding = await asyncio.to_thread(cache.embed, user_query)
+    cached = cache.lookup(scope, embedding)
+    if cached is not None:
+        st.code(cached[0], language="sql")
+        return cached
+    
+    async def run_query(vars):
+        return await asyncio.to_thread(run_sql, db, vars["query"])
+    
+    chain = (
+        RunnablePassthrough.assign(response=run_query)
+        | NL_PROMPT
+        | _llm()
+        | StrOutputParser()
+    )
+    
+    # History serialization doesn't depend on the SQL, so it runs while the
+    # SQL is generated. The SQL feeds the answer prompt, so only the final
+    # answer is streamed.
+    query, history = await asyncio.gather(
+        asyncio.to_thread(generate_sql, user_query),
+        asyncio.to_thread(format_history, chat_history, history_summary),
+    )
+    st.code(query, language="sql")
+    
+    raw_response = ""
+    async for chunk in chain.astream({
+        "question": user_query,
+        "chat_history": history,
+        "query": query,
+    }):
+        raw_response += chunk
+        placeholder.markdown(raw_response)
+    _generated_sql.put((user_query, SCHEMA_HASH), query)
+
+    # Clean up the response to remove explanatory text
+    match = SENTENCE_END.search(raw_response)
+    cleaned_response = raw_response if match is None else raw_response[:match.end()]
+
+    await asyncio.to_thread(cache.add, scope, user_query, embedding, query, cleaned_response)
+    return query, cleaned_response
+
+def get_response(user_query: str, db: SQLDatabase, chat_history: list, history_summary: str, placeholder):
+    scope = _connection_scope(db)
+    key = (user_query, SCHEMA_HASH, scope)
+    cached = _answers.get(key)
+    if cached is not None:
+        query, answer = cached
+        st.code(query, language="sql")
+        return answer
+    
+    # Reuse one event loop per session instead of setting one up on every Send
+    if "event_loop" not in st.session_state:
+        st.session_state.event_loop = asyncio.new_event_loop()
+    query, answer = st.session_state.event_loop.run_until_complete(
+        get_response_async(user_query, db, chat_history, history_summary, scope, placeholder)
+    )
+    _answers.put(key, (query, answer))
+    return answer
@@ -0,0 +1,134 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import faiss
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+# Bounded exact-match cache with least-recently-used eviction and a TTL.
+class LRUCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            created_at, value = item
+            if created_at < time.time() - self.ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = (time.time(), value)
+            self._items.move_to_end(key)
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+
+# Answer cache keyed on question embeddings. SQLite keeps the entries across
+# restarts; an in-memory FAISS inner-product index over the L2-normalized
+# embeddings answers nearest-neighbour lookups, so the score is the cosine
+# similarity. Answers depend on the database, so every entry belongs to a
+# scope (the connection target) and is only matched within it, and entries
+# older than ttl seconds are evicted.
+class SemanticCache:
+    def __init__(self, path: str, model_name: str = EMBEDDING_MODEL, threshold: float = 0.92, ttl: float = 3600):
+        self.threshold = threshold
+        self.ttl = ttl
+        self._model = SentenceTransformer(model_name)
+        self._dim = self._model.get_sentence_embedding_dimension()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(semantic_cache)")}
+        if columns and "scope" not in columns:
+            # Rows from before scoping can't be attributed to a connection
+            self._conn.execute("DROP TABLE semantic_cache")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS semantic_cache (
+                id INTEGER PRIMARY KEY,
+                scope TEXT NOT NULL,
+                question TEXT NOT NULL,
+                sql TEXT NOT NULL,
+                response TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        # Rows keyed on a per-conversation scope ("target#hash") are never
+        # matched again and would each get a single-entry index
+        self._conn.execute("DELETE FROM semantic_cache WHERE scope LIKE '%#%'")
+        self._conn.commit()
+        self._rebuild()
+
+    def _rebuild(self):
+        # Drops expired rows, then builds one index per connection target;
+        # index positions line up with that scope's entry list. IndexFlatIP
+        # has no cheap per-row delete, so eviction rebuilds from SQLite.
+        self._conn.execute("DELETE FROM semantic_cache WHERE created_at < ?", (time.time() - self.ttl,))
+        self._conn.commit()
+        rows = self._conn.execute(
+            "SELECT scope, sql, response, embedding, created_at FROM semantic_cache ORDER BY id"
+        ).fetchall()
+        grouped = {}
+        for scope, sql, response, blob, _ in rows:
+            entries, vectors = grouped.setdefault(scope, ([], []))
+            entries.append((sql, response))
+            vectors.append(np.frombuffer(blob, dtype=np.float32))
+        self._scopes = {}
+        for scope, (entries, vectors) in grouped.items():
+            matrix = np.vstack(vectors)
+            faiss.normalize_L2(matrix)
+            index = faiss.IndexFlatIP(self._dim)
+            index.add(matrix)
+            self._scopes[scope] = (index, entries)
+        self._oldest = min((row[4] for row in rows), default=None)
+
+    def embed(self, question: str) -> np.ndarray:
+        normalized = " ".join(question.lower().split())
+        return self._model.encode(normalized, normalize_embeddings=True).astype(np.float32)
+
+    def lookup(self, scope: str, embedding: np.ndarray):
+        # Returns the cached (sql, response) for the closest question in the
+        # scope, or None
+        with self._lock:
+            if self._oldest is not None and self._oldest < time.time() - self.ttl:
+                self._rebuild()
+            if scope not in self._scopes:
+                return None
+            index, entries = self._scopes[scope]
+            scores, positions = index.search(embedding[np.newaxis, :], 1)
+            if scores[0][0] < self.threshold:
+                return None
+            return entries[positions[0][0]]
+
+    def add(self, scope: str, question: str, embedding: np.ndarray, sql: str, response: str):
+        with self._lock:
+            created_at = time.time()
+            self._conn.execute(
+                "INSERT INTO semantic_cache (scope, question, sql, response, embedding, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (scope, question, sql, response, embedding.tobytes(), created_at),
+            )
+            self._conn.commit()
+            if scope not in self._scopes:
+                self._scopes[scope] = (faiss.IndexFlatIP(self._dim), [])
+            index, entries = self._scopes[scope]
+            index.add(embedding[np.newaxis, :])
+            entries.append((sql, response))
+            if self._oldest is None:
+                self._oldest = created_at
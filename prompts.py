@@ -0,0 +1,195 @@
+import hashlib
+
+from langchain_core.messages import SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+# Hand-written schema, one block per table, so no information_schema queries
+# are needed per question.
+SCHEMA_BY_TABLE = {
+    "employee_data": """\
+        employee_data:
+        EmpID
+        First Name
+        Last Name
+        Start Date
+        Exit Date
+        Title
+        Supervisor
+        Email
+        Business Unit
+        Employee Status
+        Employee Type
+        Pay Zone
+        Employee Classification Type
+        Termination Type
+        Termination Description
+        Department Type
+        Division Description
+        DOB (Date of Birth)
+        State
+        Job Function
+        Gender
+        Location
+        Race (or) Ethnicity
+        Marital Status
+        Performance Score
+        Current Employee Rating""",
+    "employee_engagement_survey_data": """\
+        employee_engagement_survey_data:
+        Employee ID
+        Survey Date
+        Engagement Score
+        Satisfaction Score
+        Work-Life Balance Score""",
+    "recruitment_data": """\
+        recruitment_data:
+        Applicant ID
+        Application Date
+        First Name
+        Last Name
+        Gender
+        Date of Birth
+        Phone Number
+        Email
+        Address
+        City
+        State
+        Zip Code
+        Country
+        Education Level
+        Years of Experience
+        Desired Salary
+        Job Title
+        Status""",
+    "training_and_development_data": """\
+        training_and_development_data:
+        Employee ID
+        Training Date
+        Training Program Name
+        Training Type
+        Training Outcome
+        Location
+        Trainer
+        Training Duration (Days)
+        Training Cost""",
+}
+
+# Substrings of a question that suggest it touches a table. Missing a table
+# is the costly mistake: the model can't reference columns it wasn't shown,
+# so the lists err on the broad side. Survey and training rows only carry an
+# Employee ID, so anything that names or identifies people pulls in
+# employee_data for the join.
+TABLE_KEYWORDS = {
+    "employee_data": {
+        "employee", "staff", "hire", "start date", "exit", "terminat", "title",
+        "supervisor", "business unit", "department", "division", "pay zone",
+        "classification", "job function", "gender", "race", "ethnicity",
+        "marital", "birth", "performance", "rating", "location", "state",
+        "name", "email", "who", "whose", "person", "people", "manager",
+    },
+    "employee_engagement_survey_data": {
+        "engagement", "survey", "satisfaction", "work-life", "work life", "balance",
+    },
+    "recruitment_data": {
+        "recruit", "applicant", "application", "candidate", "hiring", "salary",
+        "education", "experience", "zip", "country", "city",
+    },
+    "training_and_development_data": {
+        "training", "trainer", "program", "course", "development", "cost",
+    },
+}
+
+def render_schema(tables) -> str:
+    blocks = "\n\n".join(SCHEMA_BY_TABLE[table] for table in tables)
+    return f"""
+        Database Name: employee_db
+        Tables:
+{blocks}
+"""
+
+SCHEMA_BLOCK = render_schema(SCHEMA_BY_TABLE)
+
+SCHEMA_HASH = hashlib.blake2b(SCHEMA_BLOCK.encode(), digest_size=8).hexdigest()
+
+def schema_for_question(question: str) -> str:
+    # Only ship the tables the question plausibly touches; fall back to the
+    # full schema when nothing matches
+    lowered = question.lower()
+    relevant = [
+        table for table, keywords in TABLE_KEYWORDS.items()
+        if any(keyword in lowered for keyword in keywords)
+    ]
+    return render_schema(relevant) if relevant else SCHEMA_BLOCK
+
+# Static instructions and examples come first and the per-question schema
+# goes in the human message, so the local model's prompt cache can reuse the
+# shared prefix across questions.
+SQL_SYSTEM_TEMPLATE = """
+        Instructions:
+        Write a SQL query based on the user's question.
+        Use only the tables and fields listed with the question.
+        Ensure that column names with spaces are enclosed in backticks (`).
+        Provide only the SQL query and nothing else.
+        Do not include additional text or formatting.
+
+        Examples:
+        Question: What is the average engagement score?
+        SQL Query: SELECT AVG(`Engagement Score`) AS avg_engagement_score FROM employee_engagement_survey_data;
+
+        Question: How has the average engagement score changed over time?
+        SQL Query: SELECT `Survey Date`, AVG(`Engagement Score`) AS avg_engagement_score FROM employee_engagement_survey_data GROUP BY `Survey Date` ORDER BY `Survey Date`;
+
+        Question: Show the engagement scores for all employees surveyed in the last quarter.
+        SQL Query: SELECT `Employee ID`, `Engagement Score` FROM employee_engagement_survey_data WHERE `Survey Date` >= DATE('now', '-3 month');
+
+        Question: What is the range of work-life balance scores?
+        SQL Query: SELECT MIN(`Work-Life Balance Score`) AS min_score, MAX(`Work-Life Balance Score`) AS max_score FROM employee_engagement_survey_data;
+"""
+
+SQL_HUMAN_TEMPLATE = """{schema}
+        Your Turn:
+        Question: {question}
+        SQL Query:
+"""
+
+# GBNF grammar for the local SQL model: a single SELECT over the known tables
+SQL_GRAMMAR = r"""
+root   ::= "SELECT " text " FROM " table join* clause* ";"
+table  ::= name alias?
+name   ::= "employee_data" | "employee_engagement_survey_data" | "recruitment_data" | "training_and_development_data"
+alias  ::= " AS"? " " [a-zA-Z_] [a-zA-Z0-9_]*
+join   ::= " " ("LEFT " | "INNER ")? "JOIN " table " ON " text
+clause ::= " WHERE " text | " GROUP BY " text | " HAVING " text | " ORDER BY " text | " LIMIT " [0-9]+
+text   ::= [^;]+
+"""
+
+NL_TEMPLATE = """
+        You are a data analyst at a company. You are interacting with a user who is asking you questions about the company's database.
+        Based on the table schema below, question, sql query, and sql response, write a natural language response.
+        <SCHEMA>""" + SCHEMA_BLOCK + """</SCHEMA>
+    
+        Conversation History: {chat_history}
+        SQL Query: <SQL>{query}</SQL>
+        User question: {question}
+        SQL Response: {response}
+"""
+
+SUMMARY_TEMPLATE = """
+        Summarize the conversation between a user and a SQL assistant below in two or three sentences.
+        Keep any names, filters, or figures the user may refer back to.
+
+        Summary so far: {summary}
+
+        New messages:
+        {messages}
+"""
+
+# Built once, when the module is first imported
+SQL_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content=SQL_SYSTEM_TEMPLATE),
+    ("human", SQL_HUMAN_TEMPLATE),
+])
+
+NL_PROMPT = ChatPromptTemplate.from_template(NL_TEMPLATE)
+
+SUMMARY_PROMPT = ChatPromptTemplate.from_template(SUMMARY_TEMPLATE)
@@ -0,0 +1,59 @@
+THEME_TEMPLATE = """
+    <style>
+    body {{
+        color: {text_color};
+        background-color: {bg_color};
+    }}
+    .stButton>button {{
+        background-color: {button_bg};
+        color: {button_text};
+        border-radius: 10px;
+        border: none;
+        padding: 10px 20px;
+        font-size: 16px;
+        cursor: pointer;
+        transition: background-color 0.3s, color 0.3s;
+    }}
+    .stButton>button:hover {{
+        background-color: {button_hover_bg};
+        color: {button_hover_text};
+    }}
+    .stTextInput>div>div>input, .stTextArea>div>div>textarea {{
+        background-color: {input_bg};
+        color: {input_text};
+        border-radius: 10px;
+        border: 1px solid {border_color};
+        padding: 10px;
+        font-size: 16px;
+        width: 100%;
+    }}
+    </style>
+"""
+
+THEME_COLORS = {
+    "light": dict(
+        text_color="black",
+        bg_color="white",
+        button_bg="#e0e0e0",
+        button_text="black",
+        button_hover_bg="#c0c0c0",
+        button_hover_text="black",
+        input_bg="#f0f0f0",
+        input_text="black",
+        border_color="#ddd",
+    ),
+    "dark": dict(
+        text_color="white",
+        bg_color="#1E1E1E",
+        button_bg="#333",
+        button_text="white",
+        button_hover_bg="#444",
+        button_hover_text="white",
+        input_bg="#333",
+        input_text="white",
+        border_color="#444",
+    ),
+}
+
+# Both variants are formatted once, at import time
+THEME_CSS = {theme: THEME_TEMPLATE.format(**colors) for theme, colors in THEME_COLORS.items()}